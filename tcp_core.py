@@ -0,0 +1,109 @@
+"""
+Surface model, beam casting and filtering shared by the TCP tracking demo.
+"""
+
+import math
+
+import numpy as np
+
+# ---------------------- surface ---------------------------- #
+SURFACE_A, SURFACE_K = 5.0, 0.1      # sine surface: A*sin(Kx)+10
+
+# ---------------------- helpers ---------------------------- #
+def height(x: np.ndarray) -> np.ndarray:
+    return SURFACE_A * np.sin(SURFACE_K * x) + 10.0
+
+def height_scalar(x: float) -> float:
+    return SURFACE_A * math.sin(SURFACE_K * x) + 10.0
+
+def cast_ray(x0, z0, dx, dz, step=1.0, max_len=50.0, tol=1e-6):
+    """Intersect the ray (x0,z0)+r*(dx,dz) with the surface.
+
+    The root of f(r) = z(r) - surface(x(r)) is bracketed with coarse steps
+    of 'step', starting from the closest point the surface could reach, then
+    refined by Newton's method (bisection as fallback) seeded by the hit on
+    a flat surface at the height below x0.
+    """
+    A, K = SURFACE_A, SURFACE_K
+    sin, cos = math.sin, math.cos
+
+    z_surf = A * sin(K * x0) + 10.0
+    if z0 <= z_surf:
+        return x0, z_surf, 0.0
+
+    # First-order seed: the surface is smooth, so the hit is close to this
+    r_seed = (z0 - z_surf) / -dz if dz < 0.0 else 0.0
+
+    # |surface slope| <= A*K, so the ray cannot reach the surface before r_lo
+    closing = -dz + A * K * abs(dx)
+    r_lo = min((z0 - z_surf) / closing, max_len) if closing > 0.0 else 0.0
+
+    # Bracket the first sign change
+    while True:
+        if r_lo >= max_len:
+            return x0 + dx * max_len, z0 + dz * max_len, max_len
+        r_hi = min(r_lo + step, max_len)
+        if z0 + dz * r_hi <= A * sin(K * (x0 + dx * r_hi)) + 10.0:
+            break
+        r_lo = r_hi
+
+    # Safeguarded Newton inside [r_lo, r_hi]
+    r = r_seed if r_lo < r_seed < r_hi else r_hi
+    for _ in range(50):
+        kx = K * (x0 + dx * r)
+        fr = z0 + dz * r - A * sin(kx) - 10.0
+        if fr > 0.0:
+            r_lo = r
+        else:
+            r_hi = r
+        dfr = dz - A * K * dx * cos(kx)
+        r_new = r - fr / dfr if dfr != 0.0 else r_lo
+        if not r_lo < r_new < r_hi:
+            r_new = 0.5 * (r_lo + r_hi)
+        if abs(r_new - r) < tol:
+            r = r_new
+            break
+        r = r_new
+    x = x0 + dx * r
+    return x, A * sin(K * x) + 10.0, r
+
+def unit_from_slope(m):
+    """Unit tangent & downward unit normal from slope m, as (x, z) tuples."""
+    inv = 1.0 / math.hypot(1.0, m)
+    tx, tz = inv, m * inv
+    # 90° CW of tangent; tx > 0 for any finite m, so nz = -tx < 0 (down)
+    return (tx, tz), (tz, -tx)
+
+class RollingMean:
+    """Fixed-size ring buffer with O(1) running sum / sum of squares."""
+
+    def __init__(self, window):
+        self.ring = np.zeros(window)
+        self.clear()
+
+    def clear(self):
+        self.ring[:] = 0.0
+        self.head = 0
+        self.count = 0
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+    def push(self, value):
+        old = self.ring[self.head]          # 0.0 until the window is full
+        self.sum += value - old
+        self.sumsq += value * value - old * old
+        self.ring[self.head] = value
+        self.head = (self.head + 1) % len(self.ring)
+        if self.count < len(self.ring):
+            self.count += 1
+
+    def mean(self):
+        return self.sum / self.count
+
+def pooled_var(*bufs):
+    """Population variance of all samples currently held in 'bufs'."""
+    n = sum(b.count for b in bufs)
+    if n == 0:
+        return 0.0
+    mean = sum(b.sum for b in bufs) / n
+    return max(sum(b.sumsq for b in bufs) / n - mean * mean, 0.0)
@@ -5,13 +5,19 @@ Run:   python tcp_rigid_mount_reset.py
 Press: m  (toggle moving-average smoothing)
 """
 
+import math
+import time
+
 import numpy as np
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 from matplotlib import patches
+from matplotlib.collections import LineCollection
+
+from tcp_core import (RollingMean, cast_ray, height, height_scalar, pooled_var,
+                      unit_from_slope)
 
 # ---------------------- user settings ---------------------- #
-SURFACE_A, SURFACE_K = 5.0, 0.1      # sine surface: A*sin(Kx)+10
+# (surface shape SURFACE_A, SURFACE_K is defined in tcp_core.py)
 TARGET_OFFSET = 5.0                  # TCP standoff (mm)
 SENSOR_LEAD_MM = (5.0, 10.0)         # rigid lead distances along tangent
 STEP_SIZE = 0.5                      # mm per frame (forward X motion)
@@ -19,6 +25,8 @@ NOISE_STD = 0.2                      # beam noise (mm)
 SMOOTH_WINDOW = 5                    # moving-average window
 ARROW_LEN = 3.0
 MAX_FRAMES = 200
+FRAME_INTERVAL = 0.05                # s between frames
+HUD_EVERY = 5                        # refresh HUD text every N frames
 
 # Visual geometry
 TCP_RADIUS = 1.0
@@ -29,33 +37,6 @@ LINK_WIDTH = 1.5
 X_START = 0.0
 X_END   = 100.0                      # reset when TCP goes beyond this
 
-# ---------------------- helpers ---------------------------- #
-def height(x: float) -> float:
-    return SURFACE_A * np.sin(SURFACE_K * x) + 10.0
-
-def cast_ray(x0, z0, dx, dz, step=0.1, max_len=50.0):
-    """March a ray from (x0,z0) along (dx,dz) until z <= surface(x)."""
-    for r in np.arange(0.0, max_len, step):
-        x = x0 + dx * r
-        z = z0 + dz * r
-        if z <= height(x):
-            return x, height(x), r
-    return x0 + dx * max_len, z0 + dz * max_len, max_len
-
-def seg_endpoints(center, unit_dir, length):
-    """Endpoints of a segment centered at 'center' with direction 'unit_dir'."""
-    half = unit_dir * (length / 2.0)
-    return center - half, center + half
-
-def unit_from_slope(m):
-    """Unit tangent & downward unit normal from slope m."""
-    t = np.array([1.0, m], dtype=float)
-    t /= np.linalg.norm(t)
-    n = np.array([ t[1], -t[0] ], dtype=float)   # 90° CW of tangent
-    if n[1] > 0:  # ensure normal points toward surface (down)
-        n *= -1.0
-    return t, n
-
 # ---------------------- figure setup ----------------------- #
 fig, ax = plt.subplots()
 ax.set_aspect("equal")
@@ -65,7 +46,7 @@ ax.grid(True)
 ax.set_xlabel("X")
 ax.set_ylabel("Z")
 
-x_plot = np.linspace(X_START, X_END, 1000)
+x_plot = np.linspace(X_START, X_END, 400)
 ax.plot(x_plot, height(x_plot), color="black", label="Surface")
 
 # TCP & path
@@ -80,15 +61,16 @@ norm_arrow  = ax.annotate("", xy=(0, 0), xytext=(0, 0),
 tan_arrow   = ax.annotate("", xy=(0, 0), xytext=(0, 0),
                           arrowprops=dict(arrowstyle="->", color="blue"))
 
-# Rigid links + sensor bodies
-link1_line, = ax.plot([], [], color="k", lw=LINK_WIDTH)
-link2_line, = ax.plot([], [], color="k", lw=LINK_WIDTH)
-sens1_body, = ax.plot([], [], color="k", lw=3)
-sens2_body, = ax.plot([], [], color="k", lw=3)
+# Rigid links, sensor bodies and beams, drawn as one collection
+LINK1, LINK2, SENS1, SENS2, BEAM1, BEAM2 = range(6)
+rig_lines = LineCollection(np.zeros((6, 2, 2)),
+                           colors=["k"] * 4 + ["gray"] * 2,
+                           linewidths=[LINK_WIDTH] * 2 + [3] * 2 + [1.5] * 2,
+                           linestyles=["solid"] * 4 + ["--"] * 2,
+                           zorder=2)
+ax.add_collection(rig_lines, autolim=False)
 
-# Beams + hits
-beam1_line, = ax.plot([], [], "gray", ls="--")
-beam2_line, = ax.plot([], [], "gray", ls="--")
+# Hits
 hits,       = ax.plot([], [], "go", label="Laser hits")
 
 # HUD
@@ -99,33 +81,53 @@ labels = ["Gradient", "Distance error", "Sensor variance", "Beam-1 length", "Bea
 hud = {k: ax.text(0.02, 0.93 - i * 0.04, "", transform=ax.transAxes, fontsize=9, ha="left")
        for i, k in enumerate(labels)}
 
+# Artists redrawn by blitting each frame
+artists = (tcp_dot, tcp_path, tcp_circle,
+           norm_arrow, tan_arrow,
+           rig_lines, hits,
+           *hud.values())
+
 # ---------------------- state (causal) --------------------- #
 use_smoothing = True
-buf1, buf2 = [], []              # moving-average buffers
+buf1 = RollingMean(SMOOTH_WINDOW)  # moving-average buffers
+buf2 = RollingMean(SMOOTH_WINDOW)
 
 tcp_x = 0.0
-tcp_z = height(tcp_x) + TARGET_OFFSET
-t_vec_k, n_vec_k = unit_from_slope((height(tcp_x + 0.1) - height(tcp_x - 0.1)) / 0.2)
+tcp_z = height_scalar(tcp_x) + TARGET_OFFSET
+t_vec_k, n_vec_k = unit_from_slope((height_scalar(tcp_x + 0.1) - height_scalar(tcp_x - 0.1)) / 0.2)
 
 next_tcp_x = tcp_x
 next_tcp_z = tcp_z
 t_vec_next = t_vec_k
 n_vec_next = n_vec_k
 
-hist_x, hist_z = [tcp_x], [tcp_z]
+# TCP path: one pass holds the start point plus one sample per frame
+hist = np.empty((math.ceil((X_END - X_START) / STEP_SIZE) + 2, 2))
+hist[0] = tcp_x, tcp_z
+hist_len = 1
+
+# Beam noise: one pair per path sample, redrawn by reset_state() every pass
+rng = np.random.default_rng()
+noise_pool = rng.normal(0.0, NOISE_STD, size=hist.shape)
+
+# Per-frame geometry: the rig_lines segments, written in place each frame.
+# Links and beams run sensor-outward, so TCP = geom[LINK1, 0] and the hits
+# are geom[BEAM1:BEAM2 + 1, 1].
+geom = np.empty((6, 2, 2))
 
 def reset_state():
     """Reset everything to the left/start once we traverse the surface."""
     global buf1, buf2, tcp_x, tcp_z, t_vec_k, n_vec_k
-    global next_tcp_x, next_tcp_z, t_vec_next, n_vec_next, hist_x, hist_z
+    global next_tcp_x, next_tcp_z, t_vec_next, n_vec_next, hist_len
     buf1.clear(); buf2.clear()
-    hist_x.clear(); hist_z.clear()
     tcp_x = X_START
-    tcp_z = height(tcp_x) + TARGET_OFFSET
-    t_vec_k, n_vec_k = unit_from_slope((height(tcp_x + 0.1) - height(tcp_x - 0.1)) / 0.2)
+    tcp_z = height_scalar(tcp_x) + TARGET_OFFSET
+    t_vec_k, n_vec_k = unit_from_slope((height_scalar(tcp_x + 0.1) - height_scalar(tcp_x - 0.1)) / 0.2)
     next_tcp_x, next_tcp_z = tcp_x, tcp_z
     t_vec_next, n_vec_next = t_vec_k, n_vec_k
-    hist_x.append(tcp_x); hist_z.append(tcp_z)
+    hist[0] = tcp_x, tcp_z
+    hist_len = 1
+    noise_pool[:] = rng.normal(0.0, NOISE_STD, size=noise_pool.shape)
 
 # ---------------------- controls --------------------------- #
 def on_key(evt):
@@ -139,25 +141,28 @@ fig.canvas.mpl_connect("key_press_event", on_key)
 def update(frame):
     global tcp_x, tcp_z, t_vec_k, n_vec_k
     global next_tcp_x, next_tcp_z, t_vec_next, n_vec_next
-    global buf1, buf2
+    global buf1, buf2, hist_len
 
     # 1) Use current pose_k to place rigid sensors
-    tcp = np.array([tcp_x, tcp_z])
-    s1  = tcp + t_vec_k * SENSOR_LEAD_MM[0]
-    s2  = tcp + t_vec_k * SENSOR_LEAD_MM[1]
+    g = geom
+    tx, tz = t_vec_k
+    s1x, s1z = tcp_x + tx * SENSOR_LEAD_MM[0], tcp_z + tz * SENSOR_LEAD_MM[0]
+    s2x, s2z = tcp_x + tx * SENSOR_LEAD_MM[1], tcp_z + tz * SENSOR_LEAD_MM[1]
+    g[LINK1] = (tcp_x, tcp_z), (s1x, s1z)
+    g[LINK2] = (tcp_x, tcp_z), (s2x, s2z)
 
     # 2) Beams along current normal_k
-    x1, z1, d1 = cast_ray(s1[0], s1[1], n_vec_k[0], n_vec_k[1])
-    x2, z2, d2 = cast_ray(s2[0], s2[1], n_vec_k[0], n_vec_k[1])
+    x1, z1, d1 = cast_ray(s1x, s1z, n_vec_k[0], n_vec_k[1])
+    x2, z2, d2 = cast_ray(s2x, s2z, n_vec_k[0], n_vec_k[1])
+    g[BEAM1] = (s1x, s1z), (x1, z1)
+    g[BEAM2] = (s2x, s2z), (x2, z2)
 
     # 3) Noise + optional smoothing
-    z1m = z1 + np.random.normal(0, NOISE_STD)
-    z2m = z2 + np.random.normal(0, NOISE_STD)
-    buf1.append(z1m); buf2.append(z2m)
-    if len(buf1) > SMOOTH_WINDOW:
-        buf1.pop(0); buf2.pop(0)
-    z1_f = np.mean(buf1) if use_smoothing else z1m
-    z2_f = np.mean(buf2) if use_smoothing else z2m
+    z1m = z1 + noise_pool[hist_len, 0]    # row of this frame's path sample
+    z2m = z2 + noise_pool[hist_len, 1]
+    buf1.push(z1m); buf2.push(z2m)
+    z1_f = buf1.mean() if use_smoothing else z1m
+    z2_f = buf2.mean() if use_smoothing else z2m
 
     # 4) Estimate gradient from filtered hits → pose_{k+1}
     denom = (x2 - x1) if (x2 - x1) != 0 else 1e-9
@@ -170,10 +175,11 @@ def update(frame):
     next_tcp_x = tcp_x + STEP_SIZE
 
     # 5) Draw pose_k
-    tcp_dot.set_data(tcp_x, tcp_z)
+    tcp_dot.set_data(g[LINK1, :1, 0], g[LINK1, :1, 1])
     tcp_circle.center = (tcp_x, tcp_z)
-    hist_x.append(tcp_x); hist_z.append(tcp_z)
-    tcp_path.set_data(hist_x, hist_z)
+    hist[hist_len] = tcp_x, tcp_z
+    hist_len += 1
+    tcp_path.set_data(hist[:hist_len, 0], hist[:hist_len, 1])
 
     norm_arrow.xy = (tcp_x + n_vec_k[0] * ARROW_LEN, tcp_z + n_vec_k[1] * ARROW_LEN)
     norm_arrow.set_position((tcp_x, tcp_z))
@@ -181,26 +187,23 @@ def update(frame):
     tan_arrow.set_position((tcp_x, tcp_z))
 
     # Rigid links and sensor bodies (bars along tangent_k)
-    sb1_p0, sb1_p1 = seg_endpoints(s1, t_vec_k, SENSOR_BODY_LEN)
-    sb2_p0, sb2_p1 = seg_endpoints(s2, t_vec_k, SENSOR_BODY_LEN)
-    sens1_body.set_data([sb1_p0[0], sb1_p1[0]], [sb1_p0[1], sb1_p1[1]])
-    sens2_body.set_data([sb2_p0[0], sb2_p1[0]], [sb2_p0[1], sb2_p1[1]])
-    link1_line.set_data([tcp[0], s1[0]], [tcp[1], s1[1]])
-    link2_line.set_data([tcp[0], s2[0]], [tcp[1], s2[1]])
-
-    # Beams and hits
-    beam1_line.set_data([s1[0], x1], [s1[1], z1])
-    beam2_line.set_data([s2[0], x2], [s2[1], z2])
-    hits.set_data([x1, x2], [z1, z2])
-
-    # HUD
-    err = tcp_z - height(tcp_x) - TARGET_OFFSET
-    var = np.var(buf1 + buf2) if buf1 else 0.0
-    hud["Gradient"].set_text(f"Gradient       : {slope: .4f}")
-    hud["Distance error"].set_text(f"Distance error : {err: .3f}")
-    hud["Sensor variance"].set_text(f"Sensor variance: {var: .4f}")
-    hud["Beam-1 length"].set_text(f"Beam-1 length  : {d1: .2f}")
-    hud["Beam-2 length"].set_text(f"Beam-2 length  : {d2: .2f}")
+    hx, hz = tx * (SENSOR_BODY_LEN / 2.0), tz * (SENSOR_BODY_LEN / 2.0)
+    g[SENS1] = (s1x - hx, s1z - hz), (s1x + hx, s1z + hz)
+    g[SENS2] = (s2x - hx, s2z - hz), (s2x + hx, s2z + hz)
+    rig_lines.set_segments(g)
+
+    # Hits
+    hits.set_data(g[BEAM1:BEAM2 + 1, 1, 0], g[BEAM1:BEAM2 + 1, 1, 1])
+
+    # HUD (throttled; text need not change every frame)
+    if frame % HUD_EVERY == 0:
+        err = tcp_z - height_scalar(tcp_x) - TARGET_OFFSET
+        var = pooled_var(buf1, buf2)
+        hud["Gradient"].set_text(f"Gradient       : {slope: .4f}")
+        hud["Distance error"].set_text(f"Distance error : {err: .3f}")
+        hud["Sensor variance"].set_text(f"Sensor variance: {var: .4f}")
+        hud["Beam-1 length"].set_text(f"Beam-1 length  : {d1: .2f}")
+        hud["Beam-2 length"].set_text(f"Beam-2 length  : {d2: .2f}")
 
     # 6) Advance to pose_{k+1} or reset if beyond X_END
     if next_tcp_x >= X_END:
@@ -209,14 +212,49 @@ def update(frame):
         tcp_x, tcp_z = next_tcp_x, next_tcp_z
         t_vec_k, n_vec_k = t_vec_next, n_vec_next
 
-    return (tcp_dot, tcp_path, tcp_circle,
-            norm_arrow, tan_arrow,
-            link1_line, link2_line, sens1_body, sens2_body,
-            beam1_line, beam2_line, hits,
-            *hud.values())
+    return artists
+
+# ---------------------- render loop ----------------------- #
+background = None
+
+def draw_artists():
+    for a in artists:
+        ax.draw_artist(a)
+
+def on_draw(evt):
+    """Re-capture the static background after every full redraw (e.g. resize).
+
+    All blitted artists stay inside the axes, so only ax.bbox is copied.
+    """
+    global background
+    background = fig.canvas.copy_from_bbox(ax.bbox)
+    draw_artists()
+
+def run():
+    """Step and blit frames until the window is closed."""
+    for a in artists:
+        a.set_animated(True)         # keep them out of the background
+    fig.canvas.mpl_connect("draw_event", on_draw)
+    plt.show(block=False)
+    fig.canvas.draw()
+
+    frame = 0
+    while plt.fignum_exists(fig.number):
+        t0 = time.perf_counter()
+        update(frame)
+        fig.canvas.restore_region(background)
+        draw_artists()
+        fig.canvas.blit(ax.bbox)
+        fig.canvas.flush_events()
+        if not plt.fignum_exists(fig.number):
+            break                    # window closed while handling events
+        frame = (frame + 1) % MAX_FRAMES
+        remaining = FRAME_INTERVAL - (time.perf_counter() - t0)
+        if remaining > 0:
+            fig.canvas.start_event_loop(remaining)
 
-ani = animation.FuncAnimation(fig, update, frames=MAX_FRAMES,
-                              interval=50, blit=True, repeat=True)
 ax.legend(loc="upper right")
 plt.tight_layout()
-plt.show()
+
+if __name__ == "__main__":
+    run()